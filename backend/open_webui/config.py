@@ -2023,6 +2023,10 @@ else:
     except Exception:
         PGVECTOR_POOL_RECYCLE = 3600
 
+PGVECTOR_SEARCH_DISABLE_BITMAPSCAN = (
+    os.environ.get("PGVECTOR_SEARCH_DISABLE_BITMAPSCAN", "false").lower() == "true"
+)
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2404,6 +2408,10 @@ RAG_EMBEDDING_BATCH_SIZE = PersistentConfig(
     ),
 )
 
+RAG_EMBEDDING_CONCURRENT_REQUESTS = int(
+    os.environ.get("RAG_EMBEDDING_CONCURRENT_REQUESTS", "1")
+)
+
 RAG_EMBEDDING_QUERY_PREFIX = os.environ.get("RAG_EMBEDDING_QUERY_PREFIX", None)
 
 RAG_EMBEDDING_CONTENT_PREFIX = os.environ.get("RAG_EMBEDDING_CONTENT_PREFIX", None)
@@ -2436,6 +2444,10 @@ RAG_RERANKING_MODEL_TRUST_REMOTE_CODE = (
     os.environ.get("RAG_RERANKING_MODEL_TRUST_REMOTE_CODE", "True").lower() == "true"
 )
 
+# Maximum number of retrieved candidates passed to the reranker (0 = no limit).
+# Reranking latency grows linearly with this value.
+RAG_RERANKING_CANDIDATE_CAP = int(os.environ.get("RAG_RERANKING_CANDIDATE_CAP", "100"))
+
 RAG_EXTERNAL_RERANKER_URL = PersistentConfig(
     "RAG_EXTERNAL_RERANKER_URL",
     "rag.external_reranker_url",
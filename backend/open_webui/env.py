@@ -647,6 +647,24 @@ else:
     except Exception:
         SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS = None
 
+
+SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE = os.environ.get(
+    "SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE", "32"
+)
+try:
+    SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE = int(
+        SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE
+    )
+except Exception:
+    SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE = 32
+
+SENTENCE_TRANSFORMERS_CROSS_ENCODER_ONNX_QUANTIZED = (
+    os.environ.get(
+        "SENTENCE_TRANSFORMERS_CROSS_ENCODER_ONNX_QUANTIZED", "False"
+    ).lower()
+    == "true"
+)
+
 ####################################
 # OFFLINE_MODE
 ####################################
@@ -1,9 +1,13 @@
+import json
 import logging
 import os
 from typing import Optional, Union
 
+import numpy as np
 import requests
 import hashlib
+import threading
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor
 import time
 
@@ -22,6 +26,8 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.models.base_reranker import BaseReranker
 from open_webui.utils.access_control import has_access
 
 
@@ -29,16 +35,22 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
     RAG_EMBEDDING_CONTENT_PREFIX,
     RAG_EMBEDDING_PREFIX_FIELD_NAME,
+    RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    RAG_RERANKING_CANDIDATE_CAP,
 )
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# Vector DBs whose search() handles several query vectors in a single request
+MULTI_VECTOR_SEARCH_DBS = [VectorType.PGVECTOR, VectorType.MILVUS]
+
 
 from typing import Any
 
@@ -79,13 +91,23 @@ class VectorSearchRetriever(BaseRetriever):
 
 
 def query_doc(
-    collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
+    collection_name: str,
+    query_embedding: Union[list[float], list[list[float]]],
+    k: int,
+    user: UserModel = None,
 ):
     try:
         log.debug(f"query_doc:doc {collection_name}")
+        # A list of embeddings is searched in a single call, returning one
+        # result row per query vector
+        vectors = (
+            query_embedding
+            if query_embedding and isinstance(query_embedding[0], list)
+            else [query_embedding]
+        )
         result = VECTOR_DB_CLIENT.search(
             collection_name=collection_name,
-            vectors=[query_embedding],
+            vectors=vectors,
             limit=k,
         )
 
@@ -112,6 +134,48 @@ def get_doc(collection_name: str, user: UserModel = None):
         raise e
 
 
+BM25_RETRIEVER_CACHE_SIZE = 8
+_bm25_retriever_cache: OrderedDict = OrderedDict()
+_bm25_retriever_cache_lock = threading.Lock()
+
+
+def get_bm25_retriever(
+    collection_name: str, collection_result: GetResult, k: int
+) -> BM25Retriever:
+    # Reuse the BM25 index across requests while the collection content, including
+    # the metadata returned with each hit, is unchanged
+    digest = hashlib.sha256()
+    for id, document, metadata in zip(
+        collection_result.ids[0],
+        collection_result.documents[0],
+        collection_result.metadatas[0],
+    ):
+        digest.update(
+            f"{id}\0{document}\0{json.dumps(metadata, sort_keys=True, default=str)}\0".encode()
+        )
+    cache_key = (collection_name, digest.hexdigest(), k)
+
+    with _bm25_retriever_cache_lock:
+        bm25_retriever = _bm25_retriever_cache.get(cache_key)
+        if bm25_retriever is not None:
+            _bm25_retriever_cache.move_to_end(cache_key)
+            return bm25_retriever
+
+    bm25_retriever = BM25Retriever.from_texts(
+        texts=collection_result.documents[0],
+        metadatas=collection_result.metadatas[0],
+    )
+    bm25_retriever.k = k
+
+    with _bm25_retriever_cache_lock:
+        _bm25_retriever_cache[cache_key] = bm25_retriever
+        _bm25_retriever_cache.move_to_end(cache_key)
+        while len(_bm25_retriever_cache) > BM25_RETRIEVER_CACHE_SIZE:
+            _bm25_retriever_cache.popitem(last=False)
+
+    return bm25_retriever
+
+
 def query_doc_with_hybrid_search(
     collection_name: str,
     collection_result: GetResult,
@@ -122,16 +186,13 @@ def query_doc_with_hybrid_search(
     k_reranker: int,
     r: float,
     hybrid_bm25_weight: float,
+    bm25_retriever: Optional[BM25Retriever] = None,
 ) -> dict:
     try:
         # BM_25 required only if weight is greater than 0
-        if hybrid_bm25_weight > 0:
+        if hybrid_bm25_weight > 0 and bm25_retriever is None:
             log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
-            bm25_retriever = BM25Retriever.from_texts(
-                texts=collection_result.documents[0],
-                metadatas=collection_result.metadatas[0],
-            )
-            bm25_retriever.k = k
+            bm25_retriever = get_bm25_retriever(collection_name, collection_result, k)
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -166,18 +227,15 @@ def query_doc_with_hybrid_search(
 
         result = compression_retriever.invoke(query)
 
+        # retrieve only min(k, k_reranker) items; the compressor already returns
+        # them sorted by score, so cutting the list is enough
+        if k < k_reranker:
+            result = result[:k]
+
         distances = [d.metadata.get("score") for d in result]
         documents = [d.page_content for d in result]
         metadatas = [d.metadata for d in result]
 
-        # retrieve only min(k, k_reranker) items, sort and cut by distance if k < k_reranker
-        if k < k_reranker:
-            sorted_items = sorted(
-                zip(distances, metadatas, documents), key=lambda x: x[0], reverse=True
-            )
-            sorted_items = sorted_items[:k]
-            distances, documents, metadatas = map(list, zip(*sorted_items))
-
         result = {
             "distances": [distances],
             "documents": [documents],
@@ -217,7 +275,10 @@ def merge_get_results(get_results: list[dict]) -> dict:
 
 def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
     # Initialize lists to store combined data
-    combined = dict()  # To store documents with unique document hashes
+    # Keyed by the document text itself; str hashes are computed in C and
+    # cached on the object, so no separate digest is needed for uniqueness
+    combined = dict()
+    get_combined = combined.get
 
     for data in query_results:
         distances = data["distances"][0]
@@ -226,17 +287,10 @@ def merge_and_sort_query_results(query_results: list[dict], k: int) -> dict:
 
         for distance, document, metadata in zip(distances, documents, metadatas):
             if isinstance(document, str):
-                doc_hash = hashlib.sha256(
-                    document.encode()
-                ).hexdigest()  # Compute a hash for uniqueness
-
-                if doc_hash not in combined.keys():
-                    combined[doc_hash] = (distance, document, metadata)
-                    continue  # if doc is new, no further comparison is needed
-
-                # if doc is alredy in, but new distance is better, update
-                if distance > combined[doc_hash][0]:
-                    combined[doc_hash] = (distance, document, metadata)
+                # Keep the doc if it is new, or if the new distance is better
+                existing = get_combined(document)
+                if existing is None or distance > existing[0]:
+                    combined[document] = (distance, document, metadata)
 
     combined = list(combined.values())
     # Sort the list based on distances
@@ -281,13 +335,13 @@ def query_collection(
     results = []
     error = False
 
-    def process_query_collection(collection_name, query_embedding):
+    def process_query_collection(collection_name, query_embeddings):
         try:
             if collection_name:
                 result = query_doc(
                     collection_name=collection_name,
                     k=k,
-                    query_embedding=query_embedding,
+                    query_embedding=query_embeddings,
                 )
                 if result is not None:
                     return result.model_dump(), None
@@ -302,21 +356,32 @@ def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
+    # Search every query vector against a collection in one round trip where the
+    # vector DB answers multi-vector searches natively
+    if VECTOR_DB in MULTI_VECTOR_SEARCH_DBS:
+        tasks = [(cn, query_embeddings) for cn in collection_names]
+    else:
+        tasks = [(cn, [qe]) for qe in query_embeddings for cn in collection_names]
+
     with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
+        future_results = [
+            executor.submit(process_query_collection, cn, vectors)
+            for cn, vectors in tasks
+        ]
         task_results = [future.result() for future in future_results]
 
     for result, err in task_results:
         if err is not None:
             error = True
         elif result is not None:
-            results.append(result)
+            # Split into one single-query result per query vector
+            results.extend(
+                {
+                    key: [value[idx]] if value is not None else None
+                    for key, value in result.items()
+                }
+                for idx in range(len(result["ids"]))
+            )
 
     if error and not results:
         log.warning("All collection queries failed. No results returned.")
@@ -336,25 +401,50 @@ def query_collection_with_hybrid_search(
 ) -> dict:
     results = []
     error = False
-    # Fetch collection data once per collection sequentially
-    # Avoid fetching the same data multiple times later
+    # Fetch collection data and build its BM25 index once per collection, in
+    # parallel. Avoid fetching the same data multiple times later
     collection_results = {}
+    bm25_retrievers = {}
+
+    def fetch_collection(collection_name):
+        try:
+            log.debug(
+                f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
+            )
+            collection_result = VECTOR_DB_CLIENT.get(collection_name=collection_name)
+        except Exception as e:
+            log.exception(f"Failed to fetch collection {collection_name}: {e}")
+            return None, None
+
+        if collection_result is None:
+            return None, None
+
+        # Build the BM25 index once per collection and share it across all queries
+        try:
+            bm25_retriever = get_bm25_retriever(collection_name, collection_result, k)
+            return collection_result, bm25_retriever
+        except Exception as e:
+            log.exception(
+                f"Failed to build BM25 index for collection {collection_name}: {e}"
+            )
+            return None, None
+
     # Only retrieve entire collection if bm_25 calculation is required
     if hybrid_bm25_weight > 0:
-        for collection_name in collection_names:
-            try:
-                log.debug(
-                    f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
-                )
-                collection_results[collection_name] = VECTOR_DB_CLIENT.get(
-                    collection_name=collection_name
-                )
-            except Exception as e:
-                log.exception(f"Failed to fetch collection {collection_name}: {e}")
-                collection_results[collection_name] = None
+        collection_names = list(collection_names)
+        with ThreadPoolExecutor() as executor:
+            fetched = list(executor.map(fetch_collection, collection_names))
+
+        for collection_name, (collection_result, bm25_retriever) in zip(
+            collection_names, fetched
+        ):
+            collection_results[collection_name] = collection_result
+            if bm25_retriever is not None:
+                bm25_retrievers[collection_name] = bm25_retriever
     else:
         for collection_name in collection_names:
             collection_results[collection_name] = []
+
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
     )
@@ -371,6 +461,7 @@ def query_collection_with_hybrid_search(
                 k_reranker=k_reranker,
                 r=r,
                 hybrid_bm25_weight=hybrid_bm25_weight,
+                bm25_retriever=bm25_retrievers.get(collection_name),
             )
             return result, None
         except Exception as e:
@@ -431,15 +522,34 @@ def get_embedding_function(
 
         def generate_multiple(query, prefix, user, func):
             if isinstance(query, list):
-                embeddings = []
-                for i in range(0, len(query), embedding_batch_size):
-                    embeddings.extend(
-                        func(
-                            query[i : i + embedding_batch_size],
-                            prefix=prefix,
-                            user=user,
+                batches = [
+                    query[i : i + embedding_batch_size]
+                    for i in range(0, len(query), embedding_batch_size)
+                ]
+                if not batches:
+                    return []
+
+                max_workers = min(len(batches), RAG_EMBEDDING_CONCURRENT_REQUESTS)
+                if max_workers > 1:
+                    # Overlap the request round trips, bounded so the embedding
+                    # API is not flooded; results are collected in batch order
+                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                        results = list(
+                            executor.map(
+                                lambda batch: func(batch, prefix=prefix, user=user),
+                                batches,
+                            )
                         )
+                else:
+                    results = (
+                        func(batch, prefix=prefix, user=user) for batch in batches
                     )
+
+                embeddings = []
+                for result in results:
+                    if result is None:
+                        raise Exception("Failed to generate embeddings for batch")
+                    embeddings.extend(result)
                 return embeddings
             else:
                 return func(query, prefix, user)
@@ -458,8 +568,31 @@ def get_reranking_function(reranking_engine, reranking_model, reranking_function
         return lambda sentences, user=None: reranking_function.predict(
             sentences, user=user
         )
-    else:
+    elif isinstance(reranking_function, BaseReranker):
         return lambda sentences, user=None: reranking_function.predict(sentences)
+    else:
+        # sentence_transformers CrossEncoder
+        return lambda sentences, user=None: predict_length_sorted(
+            reranking_function, sentences
+        )
+
+
+def predict_length_sorted(cross_encoder, sentences):
+    # CrossEncoder pads every batch to its longest pair, so score the pairs in
+    # order of document length to keep similarly sized pairs in the same batch,
+    # then restore the original order
+    order = sorted(range(len(sentences)), key=lambda idx: len(sentences[idx][1]))
+    sorted_scores = np.asarray(
+        cross_encoder.predict(
+            [sentences[idx] for idx in order],
+            batch_size=SENTENCE_TRANSFORMERS_CROSS_ENCODER_BATCH_SIZE,
+            show_progress_bar=False,
+        )
+    )
+
+    scores = np.empty_like(sorted_scores)
+    scores[order] = sorted_scores
+    return scores
 
 
 def get_sources_from_items(
@@ -927,7 +1060,6 @@ def generate_embeddings(
         return embeddings[0] if isinstance(text, str) else embeddings
 
 
-import operator
 from typing import Optional, Sequence
 
 from langchain_core.callbacks import Callbacks
@@ -954,6 +1086,11 @@ class RerankCompressor(BaseDocumentCompressor):
 
         scores = None
         if reranking:
+            # Documents arrive best-first from the ensemble retriever; only the top
+            # candidates are worth the cost of reranking
+            if 0 < RAG_RERANKING_CANDIDATE_CAP < len(documents):
+                documents = documents[:RAG_RERANKING_CANDIDATE_CAP]
+
             scores = self.reranking_function(
                 [(query, doc.page_content) for doc in documents]
             )
@@ -967,25 +1104,26 @@ class RerankCompressor(BaseDocumentCompressor):
             scores = util.cos_sim(query_embedding, document_embedding)[0]
 
         if scores is not None:
-            docs_with_scores = list(
-                zip(
-                    documents,
-                    scores.tolist() if not isinstance(scores, list) else scores,
-                )
+            scores = np.asarray(
+                scores.tolist() if not isinstance(scores, list) else scores,
+                dtype=np.float64,
             )
             if self.r_score:
-                docs_with_scores = [
-                    (d, s) for d, s in docs_with_scores if s >= self.r_score
-                ]
+                indices = np.flatnonzero(scores >= self.r_score)
+            else:
+                indices = np.arange(len(scores))
+
+            # Stable sort keeps the original order among tied scores
+            indices = indices[np.argsort(-scores[indices], kind="stable")][: self.top_n]
 
-            result = sorted(docs_with_scores, key=operator.itemgetter(1), reverse=True)
             final_results = []
-            for doc, doc_score in result[: self.top_n]:
-                metadata = doc.metadata
-                metadata["score"] = doc_score
+            for idx in indices:
+                doc = documents[idx]
+                # Copy the metadata: retrieved Documents can be shared across
+                # concurrent queries (e.g. from a shared BM25 index)
                 doc = Document(
                     page_content=doc.page_content,
-                    metadata=metadata,
+                    metadata={**doc.metadata, "score": float(scores[idx])},
                 )
                 final_results.append(doc)
             return final_results
@@ -2,6 +2,7 @@ from typing import Optional, List, Dict, Any
 import logging
 import json
 from sqlalchemy import (
+    bindparam,
     func,
     literal,
     cast,
@@ -20,8 +21,8 @@ from sqlalchemy import (
 from sqlalchemy.sql import true
 from sqlalchemy.pool import NullPool, QueuePool
 
-from sqlalchemy.orm import declarative_base, scoped_session, sessionmaker
-from sqlalchemy.dialects.postgresql import JSONB, array
+from sqlalchemy.orm import aliased, declarative_base, scoped_session, sessionmaker
+from sqlalchemy.dialects.postgresql import JSONB, array, insert as pg_insert
 from pgvector.sqlalchemy import Vector
 from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
@@ -43,6 +44,7 @@ from open_webui.config import (
     PGVECTOR_POOL_MAX_OVERFLOW,
     PGVECTOR_POOL_TIMEOUT,
     PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_SEARCH_DISABLE_BITMAPSCAN,
 )
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -210,6 +212,21 @@ class PgvectorClient(VectorDBBase):
                 "The 'vector' column does not exist in the 'document_chunk' table."
             )
 
+    def _decrypted_metadata_cte(self, collection_name: str):
+        # MATERIALIZED keeps Postgres from inlining the CTE, which would copy the
+        # pgp_sym_decrypt call into every predicate that references vmetadata
+        return (
+            select(
+                DocumentChunk.id,
+                pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                ).label("vmetadata"),
+            )
+            .where(DocumentChunk.collection_name == collection_name)
+            .cte("decrypted")
+            .prefix_with("MATERIALIZED")
+        )
+
     def adjust_vector_length(self, vector: List[float]) -> List[float]:
         # Adjust vector to have length VECTOR_LENGTH
         current_length = len(vector)
@@ -279,61 +296,66 @@ class PgvectorClient(VectorDBBase):
     def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
         try:
             if PGVECTOR_PGCRYPTO:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    json_metadata = json.dumps(item["metadata"])
-                    self.session.execute(
-                        text(
-                            """
-                            INSERT INTO document_chunk
-                            (id, vector, collection_name, text, vmetadata)
-                            VALUES (
-                                :id, :vector, :collection_name,
-                                pgp_sym_encrypt(:text, :key),
-                                pgp_sym_encrypt(:metadata_text, :key)
-                            )
-                            ON CONFLICT (id) DO UPDATE SET
-                              vector = EXCLUDED.vector,
-                              collection_name = EXCLUDED.collection_name,
-                              text = EXCLUDED.text,
-                              vmetadata = EXCLUDED.vmetadata
-                        """
+                # Later items win when the same id appears more than once, and
+                # ON CONFLICT cannot update the same row twice in one statement
+                rows = {
+                    item["id"]: {
+                        "id": item["id"],
+                        "vector": self.adjust_vector_length(item["vector"]),
+                        "collection_name": collection_name,
+                        "chunk_text": item["text"],
+                        "metadata_text": json.dumps(item["metadata"]),
+                    }
+                    for item in items
+                }
+                if rows:
+                    stmt = pg_insert(DocumentChunk).values(
+                        text=pgcrypto_encrypt(
+                            bindparam("chunk_text"), PGVECTOR_PGCRYPTO_KEY
                         ),
-                        {
-                            "id": item["id"],
-                            "vector": vector,
-                            "collection_name": collection_name,
-                            "text": item["text"],
-                            "metadata_text": json_metadata,
-                            "key": PGVECTOR_PGCRYPTO_KEY,
+                        vmetadata=pgcrypto_encrypt(
+                            bindparam("metadata_text"), PGVECTOR_PGCRYPTO_KEY
+                        ),
+                    )
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[DocumentChunk.id],
+                        set_={
+                            "vector": stmt.excluded.vector,
+                            "collection_name": stmt.excluded.collection_name,
+                            "text": stmt.excluded.text,
+                            "vmetadata": stmt.excluded.vmetadata,
                         },
                     )
+                    # Batched into multi-row INSERT ... ON CONFLICT statements
+                    self.session.execute(stmt, list(rows.values()))
                 self.session.commit()
                 log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
             else:
-                for item in items:
-                    vector = self.adjust_vector_length(item["vector"])
-                    existing = (
-                        self.session.query(DocumentChunk)
-                        .filter(DocumentChunk.id == item["id"])
-                        .first()
+                # Later items win when the same id appears more than once, and
+                # ON CONFLICT cannot update the same row twice in one statement
+                rows = {
+                    item["id"]: {
+                        "id": item["id"],
+                        "vector": self.adjust_vector_length(item["vector"]),
+                        "collection_name": collection_name,
+                        "text": item["text"],
+                        "vmetadata": stringify_metadata(item["metadata"]),
+                    }
+                    for item in items
+                }
+                if rows:
+                    stmt = pg_insert(DocumentChunk)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[DocumentChunk.id],
+                        set_={
+                            "vector": stmt.excluded.vector,
+                            "collection_name": stmt.excluded.collection_name,
+                            "text": stmt.excluded.text,
+                            "vmetadata": stmt.excluded.vmetadata,
+                        },
                     )
-                    if existing:
-                        existing.vector = vector
-                        existing.text = item["text"]
-                        existing.vmetadata = stringify_metadata(item["metadata"])
-                        existing.collection_name = (
-                            collection_name  # Update collection_name if necessary
-                        )
-                    else:
-                        new_chunk = DocumentChunk(
-                            id=item["id"],
-                            vector=vector,
-                            collection_name=collection_name,
-                            text=item["text"],
-                            vmetadata=stringify_metadata(item["metadata"]),
-                        )
-                        self.session.add(new_chunk)
+                    # Batched into multi-row INSERT ... ON CONFLICT statements
+                    self.session.execute(stmt, list(rows.values()))
                 self.session.commit()
                 log.info(
                     f"Upserted {len(items)} items into collection '{collection_name}'."
@@ -371,7 +393,24 @@ class PgvectorClient(VectorDBBase):
                 .alias("query_vectors")
             )
 
+            # Rank candidates on (id, distance) only so the sort stays narrow,
+            # then join back to fetch (and decrypt) the payload of the top rows
+            candidate = aliased(DocumentChunk, name="candidate")
+            # Build the distance expression once and order by its label
+            distance = candidate.vector.cosine_distance(query_vectors.c.q_vector).label(
+                "distance"
+            )
+            subq = (
+                select(candidate.id, distance)
+                .where(candidate.collection_name == collection_name)
+                .order_by(distance)
+            )
+            if limit is not None:
+                subq = subq.limit(limit)
+            subq = subq.lateral("result")
+
             result_fields = [
+                query_vectors.c.qid,
                 DocumentChunk.id,
             ]
             if PGVECTOR_PGCRYPTO:
@@ -388,40 +427,27 @@ class PgvectorClient(VectorDBBase):
             else:
                 result_fields.append(DocumentChunk.text)
                 result_fields.append(DocumentChunk.vmetadata)
-            result_fields.append(
-                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
-                    "distance"
-                )
-            )
-
-            # Build the lateral subquery for each query vector
-            subq = (
-                select(*result_fields)
-                .where(DocumentChunk.collection_name == collection_name)
-                .order_by(
-                    (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector))
-                )
-            )
-            if limit is not None:
-                subq = subq.limit(limit)
-            subq = subq.lateral("result")
+            result_fields.append(subq.c.distance)
 
-            # Build the main query by joining query_vectors and the lateral subquery
+            # Build the main query by joining query_vectors, the lateral subquery
+            # and the matching document_chunk rows
             stmt = (
-                select(
-                    query_vectors.c.qid,
-                    subq.c.id,
-                    subq.c.text,
-                    subq.c.vmetadata,
-                    subq.c.distance,
-                )
+                select(*result_fields)
                 .select_from(query_vectors)
                 .join(subq, true())
+                .join(DocumentChunk, DocumentChunk.id == subq.c.id)
                 .order_by(query_vectors.c.qid, subq.c.distance)
             )
 
+            if PGVECTOR_SEARCH_DISABLE_BITMAPSCAN:
+                # Keep the planner on the vector index scan so rows come back in
+                # nearest-neighbour order instead of a bitmap heap scan + re-sort.
+                # SET LOCAL only lasts until the rollback below.
+                self.session.execute(text("SET LOCAL enable_bitmapscan = off"))
+
             result_proxy = self.session.execute(stmt)
             results = result_proxy.all()
+            self.session.rollback()  # read-only transaction
 
             ids = [[] for _ in range(num_queries)]
             distances = [[] for _ in range(num_queries)]
@@ -445,7 +471,6 @@ class PgvectorClient(VectorDBBase):
                 documents[qid].append(row.text)
                 metadatas[qid].append(row.vmetadata)
 
-            self.session.rollback()  # read-only transaction
             return SearchResult(
                 ids=ids, distances=distances, documents=documents, metadatas=metadatas
             )
@@ -459,25 +484,19 @@ class PgvectorClient(VectorDBBase):
     ) -> Optional[GetResult]:
         try:
             if PGVECTOR_PGCRYPTO:
-                # Build where clause for vmetadata filter
-                where_clauses = [DocumentChunk.collection_name == collection_name]
-                for key, value in filter.items():
-                    # decrypt then check key: JSON filter after decryption
-                    where_clauses.append(
-                        pgcrypto_decrypt(
-                            DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                        )[key].astext
-                        == str(value)
-                    )
+                # Decrypt vmetadata once per row, apply the JSON filter on the
+                # decrypted value for every key, then join back on id to decrypt
+                # the text of the matching rows only
+                decrypted = self._decrypted_metadata_cte(collection_name)
                 stmt = select(
-                    DocumentChunk.id,
+                    decrypted.c.id,
                     pgcrypto_decrypt(
                         DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
                     ).label("text"),
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata"),
-                ).where(*where_clauses)
+                    decrypted.c.vmetadata,
+                ).join(DocumentChunk, DocumentChunk.id == decrypted.c.id)
+                for key, value in filter.items():
+                    stmt = stmt.where(decrypted.c.vmetadata[key].astext == str(value))
                 if limit is not None:
                     stmt = stmt.limit(limit)
                 results = self.session.execute(stmt).all()
@@ -570,13 +589,13 @@ class PgvectorClient(VectorDBBase):
                 if ids:
                     wheres.append(DocumentChunk.id.in_(ids))
                 if filter:
+                    decrypted = self._decrypted_metadata_cte(collection_name)
+                    matching_ids = select(decrypted.c.id)
                     for key, value in filter.items():
-                        wheres.append(
-                            pgcrypto_decrypt(
-                                DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                            )[key].astext
-                            == str(value)
+                        matching_ids = matching_ids.where(
+                            decrypted.c.vmetadata[key].astext == str(value)
                         )
+                    wheres.append(DocumentChunk.id.in_(matching_ids))
                 stmt = DocumentChunk.__table__.delete().where(*wheres)
                 result = self.session.execute(stmt)
                 deleted = result.rowcount
@@ -2,6 +2,7 @@ import json
 import logging
 import mimetypes
 import os
+import platform
 import shutil
 import asyncio
 
@@ -100,6 +101,7 @@ from open_webui.env import (
     SENTENCE_TRANSFORMERS_MODEL_KWARGS,
     SENTENCE_TRANSFORMERS_CROSS_ENCODER_BACKEND,
     SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS,
+    SENTENCE_TRANSFORMERS_CROSS_ENCODER_ONNX_QUANTIZED,
 )
 
 from open_webui.constants import ERROR_MESSAGES
@@ -137,6 +139,49 @@ def get_ef(
     return ef
 
 
+def get_cross_encoder_model_kwargs(model_path: str) -> Optional[dict]:
+    model_kwargs = SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS
+    if (
+        not SENTENCE_TRANSFORMERS_CROSS_ENCODER_ONNX_QUANTIZED
+        or SENTENCE_TRANSFORMERS_CROSS_ENCODER_BACKEND != "onnx"
+        or DEVICE_TYPE != "cpu"
+        or (model_kwargs and "file_name" in model_kwargs)
+    ):
+        return model_kwargs
+
+    # When opted in on CPU, prefer a dynamically quantized (int8) ONNX export
+    # when the model ships one, so inference can use the int8 dot-product
+    # instructions
+    onnx_dir = os.path.join(model_path, "onnx")
+    if not os.path.isdir(onnx_dir):
+        return model_kwargs
+
+    if platform.machine().lower() in ["arm64", "aarch64"]:
+        candidates = ["model_qint8_arm64.onnx"]
+    else:
+        cpu_flags = ""
+        try:
+            with open("/proc/cpuinfo") as f:
+                cpu_flags = f.read()
+        except Exception:
+            pass
+
+        candidates = []
+        if "avx512_vnni" in cpu_flags:
+            candidates.append("model_qint8_avx512_vnni.onnx")
+        if "avx512f" in cpu_flags:
+            candidates.append("model_qint8_avx512.onnx")
+        if "avx2" in cpu_flags:
+            candidates.append("model_quint8_avx2.onnx")
+
+    for file_name in candidates:
+        if os.path.exists(os.path.join(onnx_dir, file_name)):
+            log.info(f"Using quantized ONNX reranking model: onnx/{file_name}")
+            return {**(model_kwargs or {}), "file_name": f"onnx/{file_name}"}
+
+    return model_kwargs
+
+
 def get_rf(
     engine: str = "",
     reranking_model: Optional[str] = None,
@@ -175,12 +220,13 @@ def get_rf(
                 import sentence_transformers
 
                 try:
+                    model_path = get_model_path(reranking_model, auto_update)
                     rf = sentence_transformers.CrossEncoder(
-                        get_model_path(reranking_model, auto_update),
+                        model_path,
                         device=DEVICE_TYPE,
                         trust_remote_code=RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
                         backend=SENTENCE_TRANSFORMERS_CROSS_ENCODER_BACKEND,
-                        model_kwargs=SENTENCE_TRANSFORMERS_CROSS_ENCODER_MODEL_KWARGS,
+                        model_kwargs=get_cross_encoder_model_kwargs(model_path),
                     )
                 except Exception as e:
                     log.error(f"CrossEncoder: {e}")
@@ -817,18 +863,17 @@ async def update_rag_config(
     )
 
     # Reranking settings
-    if request.app.state.config.RAG_RERANKING_ENGINE == "":
-        # Unloading the internal reranker and clear VRAM memory
-        request.app.state.rf = None
-        request.app.state.RERANKING_FUNCTION = None
-        import gc
-
-        gc.collect()
-        if DEVICE_TYPE == "cuda":
-            import torch
+    previous_reranking_config = (
+        request.app.state.config.RAG_RERANKING_ENGINE,
+        request.app.state.config.RAG_RERANKING_MODEL,
+        request.app.state.config.RAG_EXTERNAL_RERANKER_URL,
+        request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
+    )
+    reranking_enabled = (
+        request.app.state.config.ENABLE_RAG_HYBRID_SEARCH
+        and not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+    )
 
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
     request.app.state.config.RAG_RERANKING_ENGINE = (
         form_data.RAG_RERANKING_ENGINE
         if form_data.RAG_RERANKING_ENGINE is not None
@@ -847,9 +892,6 @@ async def update_rag_config(
         else request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY
     )
 
-    log.info(
-        f"Updating reranking model: {request.app.state.config.RAG_RERANKING_MODEL} to {form_data.RAG_RERANKING_MODEL}"
-    )
     try:
         request.app.state.config.RAG_RERANKING_MODEL = (
             form_data.RAG_RERANKING_MODEL
@@ -857,27 +899,53 @@ async def update_rag_config(
             else request.app.state.config.RAG_RERANKING_MODEL
         )
 
-        try:
-            if (
-                request.app.state.config.ENABLE_RAG_HYBRID_SEARCH
-                and not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
-            ):
-                request.app.state.rf = get_rf(
-                    request.app.state.config.RAG_RERANKING_ENGINE,
-                    request.app.state.config.RAG_RERANKING_MODEL,
-                    request.app.state.config.RAG_EXTERNAL_RERANKER_URL,
-                    request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
-                    True,
-                )
+        reranking_config = (
+            request.app.state.config.RAG_RERANKING_ENGINE,
+            request.app.state.config.RAG_RERANKING_MODEL,
+            request.app.state.config.RAG_EXTERNAL_RERANKER_URL,
+            request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
+        )
 
-                request.app.state.RERANKING_FUNCTION = get_reranking_function(
-                    request.app.state.config.RAG_RERANKING_ENGINE,
-                    request.app.state.config.RAG_RERANKING_MODEL,
-                    request.app.state.rf,
-                )
-        except Exception as e:
-            log.error(f"Error loading reranking model: {e}")
-            request.app.state.config.ENABLE_RAG_HYBRID_SEARCH = False
+        # Loading a reranking model is expensive, so only reload it when its
+        # settings changed or its loaded state no longer matches hybrid search
+        if reranking_config != previous_reranking_config or reranking_enabled == (
+            request.app.state.rf is None
+        ):
+            log.info(
+                f"Updating reranking model: {previous_reranking_config[1]} to {request.app.state.config.RAG_RERANKING_MODEL}"
+            )
+
+            if previous_reranking_config[0] == "":
+                # Unloading the internal reranker and clear VRAM memory
+                request.app.state.rf = None
+                request.app.state.RERANKING_FUNCTION = None
+                import gc
+
+                gc.collect()
+                if DEVICE_TYPE == "cuda":
+                    import torch
+
+                    if torch.cuda.is_available():
+                        torch.cuda.empty_cache()
+
+            try:
+                if reranking_enabled:
+                    request.app.state.rf = get_rf(
+                        request.app.state.config.RAG_RERANKING_ENGINE,
+                        request.app.state.config.RAG_RERANKING_MODEL,
+                        request.app.state.config.RAG_EXTERNAL_RERANKER_URL,
+                        request.app.state.config.RAG_EXTERNAL_RERANKER_API_KEY,
+                        True,
+                    )
+
+                    request.app.state.RERANKING_FUNCTION = get_reranking_function(
+                        request.app.state.config.RAG_RERANKING_ENGINE,
+                        request.app.state.config.RAG_RERANKING_MODEL,
+                        request.app.state.rf,
+                    )
+            except Exception as e:
+                log.error(f"Error loading reranking model: {e}")
+                request.app.state.config.ENABLE_RAG_HYBRID_SEARCH = False
     except Exception as e:
         log.exception(f"Problem updating reranking model: {e}")
         raise HTTPException(
@@ -1235,14 +1303,15 @@ def save_docs_to_vector_db(
                 strip_headers=False,  # Keep headers in content for context
             )
 
+            text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=request.app.state.config.CHUNK_SIZE,
+                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
+                add_start_index=True,
+            )
+
             md_split_docs = []
             for doc in docs:
                 md_header_splits = markdown_splitter.split_text(doc.page_content)
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=request.app.state.config.CHUNK_SIZE,
-                    chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                    add_start_index=True,
-                )
                 md_header_splits = text_splitter.split_documents(md_header_splits)
 
                 # Convert back to Document objects, preserving original metadata
@@ -1269,18 +1338,17 @@ def save_docs_to_vector_db(
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
 
+    # Metadata shared by every chunk is built once and merged into each chunk
+    shared_metadata = {
+        **(metadata if metadata else {}),
+        "embedding_config": {
+            "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+            "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+        },
+    }
+
     texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": {
-                "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-            },
-        }
-        for doc in docs
-    ]
+    metadatas = [{**doc.metadata, **shared_metadata} for doc in docs]
 
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):